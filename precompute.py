@@ -0,0 +1,195 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+
+# Background precomputation of selector combinations for an uploaded file.
+# Worker threads never call st.* functions - they only compute results and put
+# them into a shared, bounded cache that the UI reads from.
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    # Thread-safe cache with eviction scoped per file. Keys are (file_key, combo).
+    # Whole files are dropped least-recently-used first once max_files is exceeded, and
+    # within a file at most max_entries_per_file results are kept. One file's (or one
+    # session's) low-priority tail therefore never pushes out another file's results,
+    # and with Precomputer.max_jobs below max_entries_per_file it cannot push out the
+    # high-priority head of its own file either.
+    def __init__(self, max_files=8, max_entries_per_file=128):
+        self.max_files = max_files
+        self.max_entries_per_file = max_entries_per_file
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        file_key, combo = key
+        with self._lock:
+            entries = self._files.get(file_key)
+            if entries is None or combo not in entries:
+                return default
+            self._files.move_to_end(file_key)
+            entries.move_to_end(combo)
+            return entries[combo]
+
+    def put(self, key, value):
+        file_key, combo = key
+        with self._lock:
+            entries = self._files.setdefault(file_key, OrderedDict())
+            self._files.move_to_end(file_key)
+            entries[combo] = value
+            entries.move_to_end(combo)
+            while len(entries) > self.max_entries_per_file:
+                entries.popitem(last=False)
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+
+    def __contains__(self, key):
+        file_key, combo = key
+        with self._lock:
+            return combo in self._files.get(file_key, ())
+
+
+class Precomputer:
+    # Jobs of one session. start() queues the combinations in likely-next order for the
+    # current selection, but only one of them is in the shared executor at a time: each
+    # finished job submits the next one. With a single worker the sessions therefore take
+    # turns instead of one session's queue starving the others. A new file drops the
+    # previous file's queue; a new selection for the same file reorders it.
+    def __init__(self, executor, cache, max_jobs=48):
+        self.executor = executor
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.file_key = None
+        self._selection = None
+        self._compute = None
+        self._pending = deque()
+        self._running = None  # (file_key, combo, future) of the job in the executor
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def start(self, file_key, selection, compute, make_combos):
+        # make_combos() builds the likely-next list for this selection. It is only called
+        # (outside the lock) when the file or the selection changed since the last start().
+        with self._lock:
+            if (file_key, selection) == (self.file_key, self._selection):
+                return
+        combos = make_combos()
+        with self._lock:
+            done = self._done() if file_key == self.file_key else 0
+            self.file_key = file_key
+            self._selection = selection
+            self._compute = compute
+            running = self._running_combo()
+            # Only the most likely max_jobs combinations are queued; cached ones are skipped.
+            combos = [c for c in combos if (file_key, c) not in self.cache and c != running]
+            self._pending = deque(combos[:self.max_jobs])
+            self._total = done + (running is not None) + len(self._pending)
+            # If a job is still running, it submits the next one when done.
+            if self._running is None:
+                self._submit_next()
+
+    def _running_combo(self):
+        # Called with self._lock held. The combination running for the current file, if any.
+        if self._running is not None and self._running[0] == self.file_key:
+            return self._running[1]
+        return None
+
+    def _done(self):
+        # Called with self._lock held.
+        return self._total - len(self._pending) - (self._running_combo() is not None)
+
+    def _submit_next(self):
+        # Called with self._lock held.
+        while self._pending:
+            combo = self._pending.popleft()
+            if (self.file_key, combo) not in self.cache:
+                future = self.executor.submit(self._run, self.file_key, self._compute, combo)
+                self._running = (self.file_key, combo, future)
+                return
+        self._running = None
+
+    def _run(self, file_key, compute, combo):
+        try:
+            # The file has been replaced (or the UI got here first) - nothing to do.
+            if self.file_key == file_key and (file_key, combo) not in self.cache:
+                self.cache.put((file_key, combo), compute(*combo))
+        except Exception:
+            # Logged here rather than kept in the future; if the user selects this
+            # combination, get_or_compute() finds no result and computes it inline.
+            logger.exception("Background precomputation of %r failed", combo)
+        finally:
+            with self._lock:
+                self._submit_next()
+
+    def cancel(self):
+        with self._lock:
+            self.file_key = None
+            self._selection = None
+            self._compute = None
+            self._pending.clear()
+            self._total = 0
+
+    def get_or_compute(self, file_key, compute, combo):
+        key = (file_key, combo)
+        result = self.cache.get(key, _MISSING)
+        if result is not _MISSING:
+            return result
+        with self._lock:
+            running = self._running
+        # If the worker is computing this combination right now, wait for it; if it is only
+        # queued (or the job failed), compute it here - the worker skips cached combinations.
+        if running is not None and running[:2] == key and running[2].running():
+            wait([running[2]])
+            result = self.cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        result = compute(*combo)
+        self.cache.put(key, result)
+        return result
+
+    def progress(self):
+        with self._lock:
+            return self._done(), self._total
+
+
+# One worker and one bounded result cache per server process, one Precomputer per session.
+# A single worker keeps the background jobs from competing (for the GIL) with the
+# foreground computation of the selection the user is looking at.
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompute")
+
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(max_files=8, max_entries_per_file=128)
+
+
+def get_precomputer():
+    if "precomputer" not in st.session_state:
+        st.session_state.precomputer = Precomputer(get_executor(), get_result_cache())
+    return st.session_state.precomputer
+
+
+# Progress of this session's background jobs. The polling fragment is only mounted while
+# jobs are pending; it reruns on its own so the bar moves, and once the jobs are done it
+# triggers one full app rerun, which no longer mounts it - so finished sessions stop polling.
+def show_progress(label):
+    done, total = get_precomputer().progress()
+    if done < total:
+        _progress_fragment(label)
+
+
+@st.fragment(run_every=1)
+def _progress_fragment(label):
+    done, total = get_precomputer().progress()
+    if done < total:
+        st.progress(done / total, text=f"{label}: {done}/{total}")
+    else:
+        st.rerun(scope="app")
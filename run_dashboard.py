@@ -0,0 +1,31 @@
+import sys
+
+# Palaiž paneli ar iepriekšēju sagatavošanu (warm-up) pirms pirmās sesijas:
+#
+#   python run_dashboard.py scratch_21.py [streamlit run opcijas]
+#
+# Dati un lēnie moduļi tiek ielādēti šajā pašā procesā pirms Streamlit servera starta,
+# tāpēc jau pirmā sesija tos atrod gatavus (sys.modules un school_data kešā).
+# Ar parasto `streamlit run` viss strādā tāpat, tikai bez warm-up.
+
+
+def warm_up(script):
+    if script.endswith("scratch_21.py"):
+        import school_data
+        school_data.load_workbook()
+        import plotly.express  # noqa: F401
+    elif script.endswith("scratch_22.py"):
+        import matplotlib.pyplot  # noqa: F401
+        import matplotlib.gridspec  # noqa: F401
+        from scipy import stats  # noqa: F401
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Lietošana: python run_dashboard.py <skripts.py> [streamlit run opcijas]")
+    warm_up(sys.argv[1])
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run"] + sys.argv[1:]
+    sys.exit(stcli.main())
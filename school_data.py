@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+import pandas as pd
+
+# Darbgrāmatas ielāde vienreiz uz servera procesu. Kešs ir parasts moduļa līmeņa lru_cache
+# (nevis st.cache_data), lai to var aizpildīt arī run_dashboard.py pirms servera starta.
+# Atgrieztās tabulas ir kopīgas visām sesijām – tās drīkst tikai lasīt, nevis mainīt.
+EXCEL_FILE = r"school_dashboard_data2.xlsx"
+
+
+@lru_cache(maxsize=None)
+def load_workbook(path=EXCEL_FILE):
+    xl = pd.ExcelFile(path)
+    return {
+        "schools": xl.parse("Schools"),
+        "exam_perf": xl.parse("ExamPerformance"),
+        "country_avg": xl.parse("CountryAverage"),
+        "satisfaction": xl.parse("Satisfaction"),
+        "proficiency": xl.parse("ProficiencyDistribution"),
+        "extra_curriculars": xl.parse("ExtraCurriculars"),
+        "student_numbers": xl.parse("StudentNumbers"),
+    }
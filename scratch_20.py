@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+from functools import partial
+
+from precompute import get_precomputer, show_progress
 
 st.title("School Resource Surplus/Deficit Table")
 
@@ -47,67 +49,11 @@ def ensure_unique(df):
     return df
 
 # -------------------------
-# --- Main Code ---
+# --- Helper: Surplus/Deficit Table for One Selection ---
 # -------------------------
-# File uploader for CSV or Excel file.
-uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx"])
-
-if uploaded_file is not None:
-    # Read file based on extension.
-    file_extension = uploaded_file.name.split(".")[-1]
-    if file_extension == "csv":
-        df = pd.read_csv(uploaded_file, header=None)
-    elif file_extension in ["xlsx", "xls"]:
-        df = pd.read_excel(uploaded_file, header=None)
-    else:
-        st.error("Unsupported file type")
-        st.stop()
-
-    if df.shape[0] < 4:
-        st.error("The file does not have the expected structure (at least 4 rows are needed).")
-        st.stop()
-
-    # Extract header rows.
-    header_row = df.iloc[0].tolist()       # e.g., "4.x", "5.x", "6.x", "11.x"
-    class_level_row = df.iloc[1].tolist()    # e.g., "1.kl", "2.kl", etc.
-    subject_row = df.iloc[2].tolist()        # Subject info for resource columns
-    data_df = df.iloc[3:].reset_index(drop=True)
-
-    # --- Drop columns based on class level and subject ---
-    drop_subjects = {"Tiek izmantoti maksas digitālie mācību līdzekļi",
-                     "Tiek iegādāti citi mācību materiāli praktisko darbu īstenošanai"}
-    indices_to_keep = []
-    for i, cl_val in enumerate(class_level_row):
-        if i == 0:
-            indices_to_keep.append(i)  # always keep school names
-        else:
-            if str(cl_val).strip() == "Piezīmes":
-                continue
-            if str(subject_row[i]).strip() in drop_subjects:
-                continue
-            indices_to_keep.append(i)
-    header_row = [header_row[i] for i in indices_to_keep]
-    class_level_row = [class_level_row[i] for i in indices_to_keep]
-    subject_row = [subject_row[i] for i in indices_to_keep]
-    data_df = data_df.iloc[:, indices_to_keep]
-
-    # Reset the DataFrame's columns to sequential integers.
-    data_df.columns = range(len(header_row))
-
-    # --- Extract available subjects ---
-    subjects = set()
-    for i in range(1, len(subject_row)):  # skip first column (school names)
-        subj = str(subject_row[i]).strip() if pd.notna(subject_row[i]) else ""
-        if subj:
-            subjects.add(subj)
-    subjects = sorted(list(subjects))
-    if not subjects:
-        st.error("No subject information found in the file.")
-        st.stop()
-    selected_subject = st.selectbox("Select Subject", subjects)
-
-    # Let the user choose resource type.
-    resource_type = st.radio("Resource Type", options=["Textbooks", "Workbooks"])
+# Pure function (no st.* calls) so that it can also run in the background workers.
+# Returns (result, max_abs), or None if there is no class level data for the selection.
+def compute_table(header_row, class_level_row, subject_row, data_df, selected_subject, resource_type):
     resource_prefix = "5." if resource_type == "Textbooks" else "6."
 
     # --- Determine class levels for resource data ---
@@ -131,8 +77,7 @@ if uploaded_file is not None:
             new_class_levels.add(cl)
     class_levels_list = sorted(list(new_class_levels))
     if not class_levels_list:
-        st.error("No class level data found for the selected subject and resource type.")
-        st.stop()
+        return None
 
     # --- Build DataFrames for surplus/deficit and raw resource counts ---
     schools = data_df.iloc[:, 0]
@@ -226,6 +171,124 @@ if uploaded_file is not None:
     total_row.name = "Total"
     # Prepend the totals row (making it the first row).
     result = pd.concat([pd.DataFrame([total_row]), result])
+    return result, max_abs
+
+
+# -------------------------
+# --- Helper: Likely-Next Selections ---
+# -------------------------
+# The other resource type for the selected subject first, then neighbouring subjects
+# (nearest first), each with the selected resource type before the other one.
+def likely_next_combos(subjects, selected_subject, resource_type):
+    other_type = "Workbooks" if resource_type == "Textbooks" else "Textbooks"
+    combos = [(selected_subject, other_type)]
+    i = subjects.index(selected_subject)
+    for d in range(1, len(subjects)):
+        for j in (i - d, i + d):
+            if 0 <= j < len(subjects):
+                combos.append((subjects[j], resource_type))
+                combos.append((subjects[j], other_type))
+    return combos
+
+
+# -------------------------
+# --- Helper: Parse the Uploaded File ---
+# -------------------------
+# Parsed once per upload (keyed by the uploader's file_id) instead of on every widget change.
+# cache_resource returns the same objects without copying, so the UI and the background
+# workers share them - they must only be read. Raises ValueError for malformed files.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def parse_upload(file_id, _uploaded_file):
+    # Read file based on extension.
+    file_extension = _uploaded_file.name.split(".")[-1]
+    if file_extension == "csv":
+        df = pd.read_csv(_uploaded_file, header=None)
+    elif file_extension in ["xlsx", "xls"]:
+        df = pd.read_excel(_uploaded_file, header=None)
+    else:
+        raise ValueError("Unsupported file type")
+
+    if df.shape[0] < 4:
+        raise ValueError("The file does not have the expected structure (at least 4 rows are needed).")
+
+    # Extract header rows.
+    header_row = df.iloc[0].tolist()       # e.g., "4.x", "5.x", "6.x", "11.x"
+    class_level_row = df.iloc[1].tolist()    # e.g., "1.kl", "2.kl", etc.
+    subject_row = df.iloc[2].tolist()        # Subject info for resource columns
+    data_df = df.iloc[3:].reset_index(drop=True)
+
+    # --- Drop columns based on class level and subject ---
+    drop_subjects = {"Tiek izmantoti maksas digitālie mācību līdzekļi",
+                     "Tiek iegādāti citi mācību materiāli praktisko darbu īstenošanai"}
+    indices_to_keep = []
+    for i, cl_val in enumerate(class_level_row):
+        if i == 0:
+            indices_to_keep.append(i)  # always keep school names
+        else:
+            if str(cl_val).strip() == "Piezīmes":
+                continue
+            if str(subject_row[i]).strip() in drop_subjects:
+                continue
+            indices_to_keep.append(i)
+    header_row = [header_row[i] for i in indices_to_keep]
+    class_level_row = [class_level_row[i] for i in indices_to_keep]
+    subject_row = [subject_row[i] for i in indices_to_keep]
+    data_df = data_df.iloc[:, indices_to_keep]
+
+    # Reset the DataFrame's columns to sequential integers.
+    data_df.columns = range(len(header_row))
+
+    # --- Extract available subjects ---
+    subjects = set()
+    for i in range(1, len(subject_row)):  # skip first column (school names)
+        subj = str(subject_row[i]).strip() if pd.notna(subject_row[i]) else ""
+        if subj:
+            subjects.add(subj)
+    subjects = sorted(list(subjects))
+    if not subjects:
+        raise ValueError("No subject information found in the file.")
+
+    return header_row, class_level_row, subject_row, data_df, subjects
+
+
+# -------------------------
+# --- Main Code ---
+# -------------------------
+# File uploader for CSV or Excel file.
+uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx"])
+
+if uploaded_file is not None:
+    try:
+        header_row, class_level_row, subject_row, data_df, subjects = parse_upload(uploaded_file.file_id, uploaded_file)
+    except ValueError as e:
+        # A malformed file still replaces the previous one - drop that file's background work.
+        get_precomputer().cancel()
+        st.error(str(e))
+        st.stop()
+    selected_subject = st.selectbox("Select Subject", subjects)
+
+    # Let the user choose resource type.
+    resource_type = st.radio("Resource Type", options=["Textbooks", "Workbooks"])
+
+    # --- Compute the table, precomputing the other selections in the background ---
+    # A new file (different file_id) cancels the jobs still queued for the previous one.
+    file_key = uploaded_file.file_id
+    compute = partial(compute_table, header_row, class_level_row, subject_row, data_df)
+    precomputer = get_precomputer()
+    table = precomputer.get_or_compute(file_key, compute, (selected_subject, resource_type))
+    # Filled in at the end, once the background jobs have been started.
+    progress_slot = st.container()
+    # The background jobs are started (or reordered) only once this selection is on screen;
+    # the likely-next list is built only when the selection changed.
+    selection = (selected_subject, resource_type)
+    make_combos = partial(likely_next_combos, subjects, selected_subject, resource_type)
+    if table is None:
+        st.error("No class level data found for the selected subject and resource type.")
+        precomputer.start(file_key, selection, compute, make_combos)
+        with progress_slot:
+            show_progress("Precomputing other selections in the background")
+        st.stop()
+    result, max_abs = table
 
     # --- Define custom styling function ---
     def highlight_totals(df):
@@ -268,3 +331,10 @@ if uploaded_file is not None:
 """
     )
     st.dataframe(styled_result, use_container_width=True, height=600)
+
+    precomputer.start(file_key, selection, compute, make_combos)
+    with progress_slot:
+        show_progress("Precomputing other selections in the background")
+else:
+    # No file (or it was removed) - drop the background work of this session.
+    get_precomputer().cancel()
@@ -2,29 +2,79 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import plotly.express as px
+
+from school_data import load_workbook
+
+# plotly.express netiek importēts šeit – tas vajadzīgs tikai interešu izglītības tilei,
+# tāpēc to importē tikai tur. Ieguvums ir neliels (streamlit pats jau ielādē plotly
+# pamatu), lielāko daļu starta laika aizņem darbgrāmatas nolasīšana.
+# Lai dati un plotly.express būtu gatavi jau pirmajai sesijai, palaid ar:
+#   python run_dashboard.py scratch_21.py
 
 st.set_page_config(layout="wide", page_title="Skolu datu panelis")
 
+# ============================================================================
+# LAPAS KARKASS: kolonnas, virsraksti un vietturi katram tilei tiek uzzīmēti
+# pirms datu ielādes, tāpēc lapa parādās uzreiz; tālāk katrs tile aizpilda savu vietturi.
+# ============================================================================
+st.sidebar.header("Izvēlies skolu")
+school_slot = st.sidebar.empty()
+
+top_cols = st.columns(2)
+with top_cols[0]:
+    st.subheader("Skolas informācija")
+    school_tile = st.empty()
+with top_cols[1]:
+    # Instead of placing the header outside the container,
+    # we now include it in an HTML container with no extra margin.
+    st.markdown(
+        """
+        <div style="height:350px; display:flex; flex-direction:column; justify-content:flex-end; margin:0; padding:0;">
+            <h3 style="margin:0; padding:0;">Kopējais skolēnu skaits pēdējos piecos gados</h3>
+        """, unsafe_allow_html=True)
+    students_tile = st.empty()
+    st.markdown("</div>", unsafe_allow_html=True)
+
+st.markdown("---")
+
+row2_cols = st.columns(2)
+with row2_cols[0]:
+    st.subheader("Eksāmenu rezultāti")
+    exam_tile = st.empty()
+with row2_cols[1]:
+    st.subheader("Skolēnu apmierinātība")
+    satisfaction_tile = st.empty()
+
+st.markdown("---")
+
+row3_cols = st.columns(2)
+with row3_cols[0]:
+    st.subheader("Prasmju sadalījums (procentos)")
+    proficiency_tile = st.empty()
+with row3_cols[1]:
+    st.subheader("Interešu izglītība")
+    ec_tile = st.empty()
+
+for tile in [school_tile, students_tile, exam_tile, satisfaction_tile, proficiency_tile, ec_tile]:
+    tile.caption("Ielādē datus...")
+
 # ---------------------------------------
-# Ielādējam datus no Excel faila
+# Ielādējam datus (pēc warm-up tie jau ir kešā)
 # ---------------------------------------
-excel_file = r"school_dashboard_data2.xlsx"
-xl = pd.ExcelFile(excel_file)
+data = load_workbook()
 
-schools_df = xl.parse("Schools")
-exam_perf_df = xl.parse("ExamPerformance")
-country_avg_df = xl.parse("CountryAverage")
-satisfaction_df = xl.parse("Satisfaction")
-proficiency_df = xl.parse("ProficiencyDistribution")
-extra_curriculars_df = xl.parse("ExtraCurriculars")
-student_numbers_df = xl.parse("StudentNumbers")
+schools_df = data["schools"]
+exam_perf_df = data["exam_perf"]
+country_avg_df = data["country_avg"]
+satisfaction_df = data["satisfaction"]
+proficiency_df = data["proficiency"]
+extra_curriculars_df = data["extra_curriculars"]
+student_numbers_df = data["student_numbers"]
 
 # ---------------------------------------
 # Iegūstam izvēlētās skolas datus
 # ---------------------------------------
-st.sidebar.header("Izvēlies skolu")
-school_selected = st.sidebar.selectbox("Skola", schools_df["School"].unique())
+school_selected = school_slot.selectbox("Skola", schools_df["School"].unique())
 school_info = schools_df[schools_df["School"] == school_selected].iloc[0]
 map_data = pd.DataFrame({
     "lat": [school_info["Latitude"]],
@@ -34,24 +84,14 @@ map_data = pd.DataFrame({
 # ============================================================================
 # TOP RĀDĀJS: Augšējā rinda – divi tilei: (1) Skolas informācija un (2) Kopējais skolēnu skaits
 # ============================================================================
-top_cols = st.columns(2)
-
-with top_cols[0]:
-    st.subheader("Skolas informācija")
+with school_tile.container():
     st.title(school_selected)
     st.markdown(f"**Adrese:** {school_info['Address']}")
     st.markdown(f"**Direktors:** {school_info['Director']}")
     st.markdown(f"**E-pasts:** {school_info['Email']}")
     st.map(map_data)
 
-with top_cols[1]:
-    # Instead of placing the header outside the container,
-    # we now include it in an HTML container with no extra margin.
-    st.markdown(
-        """
-        <div style="height:350px; display:flex; flex-direction:column; justify-content:flex-end; margin:0; padding:0;">
-            <h3 style="margin:0; padding:0;">Kopējais skolēnu skaits pēdējos piecos gados</h3>
-        """, unsafe_allow_html=True)
+with students_tile.container():
     student_data = student_numbers_df[student_numbers_df["School"] == school_selected]
     chart_students = alt.Chart(student_data).mark_line(point=True).encode(
         x=alt.X("Year:O", title="Gads"),
@@ -59,17 +99,11 @@ with top_cols[1]:
         tooltip=["Year", "StudentCount"]
     ).properties(width=600, height=300)
     st.altair_chart(chart_students, use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-st.markdown("---")
 
 # ============================================================================
 # RINDA 2: Divi tilei – (1) Eksāmenu rezultāti un (2) Skolēnu apmierinātība
 # ============================================================================
-row2_cols = st.columns(2)
-
-with row2_cols[0]:
-    st.subheader("Eksāmenu rezultāti")
+with exam_tile.container():
     # Eksāmu atlase: šī izvēle ietekmē tikai šo tile
     school_exam_data = exam_perf_df[exam_perf_df["School"] == school_selected]
     exam_selected = st.selectbox("Izvēlies eksāmenu", school_exam_data["Exam"].unique(), key="exam_selection")
@@ -106,8 +140,7 @@ with row2_cols[0]:
     final_exam_chart = chart_exam + text
     st.altair_chart(final_exam_chart, use_container_width=True)
 
-with row2_cols[1]:
-    st.subheader("Skolēnu apmierinātība")
+with satisfaction_tile.container():
     satisfaction_filter = st.radio("Izvēlies līmeni",
                                    ["Visi", "I prasmju līmenis", "II prasmju līmenis", "III prasmju līmenis", "IV prasmju līmenis"],
                                    key="satisfaction_filter")
@@ -125,15 +158,10 @@ with row2_cols[1]:
     else:
         st.write("Nav datu attiecīgajam filtram.")
 
-st.markdown("---")
-
 # ============================================================================
 # RINDA 3: Divi tilei – (1) Prasmju sadalījums un (2) Interešu izglītība
 # ============================================================================
-row3_cols = st.columns(2)
-
-with row3_cols[0]:
-    st.subheader("Prasmju sadalījums (procentos)")
+with proficiency_tile.container():
     proficiency_data = proficiency_df[proficiency_df["School"] == school_selected]
     chart_proficiency = alt.Chart(proficiency_data).mark_bar().encode(
         y=alt.Y("Year:O", title="Gads"),
@@ -145,12 +173,12 @@ with row3_cols[0]:
     ).properties(width=600, height=300)
     st.altair_chart(chart_proficiency, use_container_width=True)
 
-with row3_cols[1]:
-    st.subheader("Interešu izglītība")
+with ec_tile.container():
     ec_data = extra_curriculars_df[extra_curriculars_df["School"] == school_selected]
     ec_grouped = ec_data.groupby("Category").agg(Count=("ExtraCurricular", "count")).reset_index()
     ec_list = ec_data.groupby("Category")["ExtraCurricular"].apply(lambda x: ", ".join(x)).reset_index().rename(columns={"ExtraCurricular": "Aktivitātes"})
     ec_grouped = ec_grouped.merge(ec_list, on="Category", how="left")
+    import plotly.express as px
     fig = px.pie(ec_grouped, names='Category', values='Count', title='Interešu izglītība pēc kategorijām')
     fig.update_traces(
         hovertemplate='<b>%{label}</b><br>Skaits: %{value}<br>Aktivitātes: %{customdata}<extra></extra>',
@@ -1,9 +1,140 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-from scipy import stats
+from functools import partial
+
+from precompute import get_precomputer, show_progress
+
+# scipy un matplotlib ir lēni importējami un vajadzīgi tikai korelācijas
+# rezultātiem, tāpēc tos importē tikai tad, kad dati ir augšupielādēti.
+# Lai tie būtu gatavi jau pirmajai sesijai, palaid ar:
+#   python run_dashboard.py scratch_22.py
+
+# ---------------------------------------
+# Aprēķinu funkcijas (bez st.* izsaukumiem, lai tās var izpildīt arī fona pavedienos)
+# ---------------------------------------
+def filter_subject(df, subject_filter):
+    # Filtrējam rindas pēc mācību priekšmeta (case-insensitive)
+    df = df[df["Pārbaudījuma mācību priekšmeta nosaukums"].str.contains(subject_filter, case=False, na=False)].copy()
+
+    # Pārliecināmies, ka "Pārbaudījuma klases pakāpe" ir teksts
+    df["Pārbaudījuma klases pakāpe"] = df["Pārbaudījuma klases pakāpe"].astype(str)
+
+    # Saglabājam tikai tos skolēnus, kuriem ir vairākas eksāmenu ieraksti.
+    student_counts = df["Eksāmena kārtošanas personas identifikators"].value_counts()
+    repeated_ids = student_counts[student_counts > 1].index
+    return df[df["Eksāmena kārtošanas personas identifikators"].isin(repeated_ids)]
+
+
+def default_exam_pair(exam_types):
+    default_x = "Diagnosticējošais darbs" if "Diagnosticējošais darbs" in exam_types else exam_types[0]
+    default_y = "Centralizēts eksāmens" if "Centralizēts eksāmens" in exam_types else exam_types[0]
+    return default_x, default_y
+
+
+def available_grades(df, exam_type):
+    df_exam = df[df["Pārbaudījuma tips"] == exam_type]
+    return sorted(df_exam["Pārbaudījuma klases pakāpe"].unique())
+
+
+def default_grade(exam_type, grades):
+    if exam_type == "Centralizēts eksāmens" and "12" in grades:
+        return "12"
+    return grades[0]
+
+
+def correlate(subject_frames, subject_choice, exam_x, grade_filter_x, exam_y, grade_filter_y):
+    df = subject_frames[subject_choice]
+
+    df_x = df[df["Pārbaudījuma tips"] == exam_x]
+    if grade_filter_x:
+        df_x = df_x[df_x["Pārbaudījuma klases pakāpe"] == grade_filter_x]
+
+    df_y = df[df["Pārbaudījuma tips"] == exam_y]
+    if grade_filter_y:
+        df_y = df_y[df_y["Pārbaudījuma klases pakāpe"] == grade_filter_y]
+
+    # Grupējam datus pēc skolēna ID un aprēķinām vidējo rezultātu, ja skolēnam ir vairāki ieraksti
+    df_x_grouped = df_x.groupby("Eksāmena kārtošanas personas identifikators")["Procenti"].mean().reset_index()
+    df_y_grouped = df_y.groupby("Eksāmena kārtošanas personas identifikators")["Procenti"].mean().reset_index()
+
+    # Apvienojam datus pēc skolēna ID – saglabājam tikai tos, kuriem ir abi eksāmenu tipi.
+    merged = pd.merge(df_x_grouped, df_y_grouped,
+                      on="Eksāmena kārtošanas personas identifikators",
+                      suffixes=("_x", "_y"))
+
+    # Izņemam gadījumus, kur rezultāts ir 0 kādā no eksāmenu tipiem.
+    merged = merged[(merged["Procenti_x"] != 0) & (merged["Procenti_y"] != 0)]
+
+    if merged.shape[0] < 3:
+        return merged, None
+
+    from scipy import stats
+
+    r, p_value = stats.pearsonr(merged["Procenti_x"], merged["Procenti_y"])
+    n = merged.shape[0]
+    se = np.sqrt((1 - r ** 2) / (n - 2))
+    slope, intercept, r_val, p_val, std_err = stats.linregress(merged["Procenti_x"], merged["Procenti_y"])
+    return merged, {"r": r, "p_value": p_value, "se": se, "slope": slope, "intercept": intercept}
+
+
+# Nākamās visticamākās izvēles: vispirms izvēlētajam priekšmetam visi klašu pāri
+# pašreizējiem eksāmenu tipiem, tad Diagnosticējošais/Centralizēts pāri visiem priekšmetiem.
+# Katrā grupā vispirms pāri, kas atšķiras no noklusējuma klasēm vismazāk.
+def likely_next_combos(subject_frames, subject_choice, exam_x, exam_y):
+    combos = []
+    subjects = [subject_choice] + [s for s in subject_frames if s != subject_choice]
+    for subject in subjects:
+        df = subject_frames[subject]
+        exam_types = sorted(df["Pārbaudījuma tips"].unique())
+        if not exam_types:
+            continue
+        pairs = [(exam_x, exam_y)] if subject == subject_choice else []
+        pairs.append(default_exam_pair(exam_types))
+        for x, y in dict.fromkeys(pairs):
+            if x not in exam_types or y not in exam_types:
+                continue
+            grades_x = available_grades(df, x)
+            grades_y = available_grades(df, y)
+            default_x, default_y = default_grade(x, grades_x), default_grade(y, grades_y)
+            grade_pairs = [(gx, gy) for gx in grades_x for gy in grades_y]
+            grade_pairs.sort(key=lambda g: (g[0] != default_x) + (g[1] != default_y))
+            combos.extend((subject, x, gx, y, gy) for gx, gy in grade_pairs)
+    return combos
+
+
+# Mācību priekšmeta izvēle
+# Rādītās opcijas tagad ir "Matemātika" un "Latviešu valoda"
+# Iekšēji filtrējam pēc "Matemātik" un "Latviešu valod"
+subject_dict = {
+    "Matemātika": "Matemātik",
+    "Latviešu valoda": "Latviešu valod"
+}
+
+expected_cols = [
+    "Eksāmena kārtošanas personas identifikators",
+    "Pārbaudījuma tips",
+    "Pārbaudījuma mācību priekšmeta nosaukums",
+    "Pārbaudījuma klases pakāpe",
+    "Procenti"
+]
+
+
+# Failu nolasām un sadalām pa priekšmetiem tikai vienreiz uz augšupielādi (atslēga – file_id),
+# nevis pie katras izvēlnes maiņas. cache_resource atgriež tos pašus objektus bez kopēšanas,
+# tāpēc UI un fona darbi lasa vienas un tās pašas tabulas (tās drīkst tikai lasīt).
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_subject_frames(file_id, _uploaded_file):
+    df = pd.read_csv(_uploaded_file)
+    if not all(col in df.columns for col in expected_cols):
+        raise ValueError("Augšupielādētajā CSV failā nav vajadzīgo kolonnu.")
+
+    # Izņem rindas, kur skolēna ID = 0.
+    df = df[df["Eksāmena kārtošanas personas identifikators"].astype(str) != "0"]
+
+    # Filtrējam visus priekšmetus uzreiz – fona darbiem vajadzīgi arī neizvēlētie.
+    return {name: filter_subject(df, subject_filter) for name, subject_filter in subject_dict.items()}
+
 
 st.title("Pārbaudes darbu rezultātu korelācijas analīze")
 
@@ -20,41 +151,15 @@ Dati iegūti no VIIS piejamā par skolēnu rezultātiem eksāmenos/diagnosticēj
 # Augšupielādes sadaļa
 uploaded_file = st.file_uploader("Izvēlies CSV failu", type=["csv"])
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
-
-    expected_cols = [
-        "Eksāmena kārtošanas personas identifikators",
-        "Pārbaudījuma tips",
-        "Pārbaudījuma mācību priekšmeta nosaukums",
-        "Pārbaudījuma klases pakāpe",
-        "Procenti"
-    ]
-    if not all(col in df.columns for col in expected_cols):
-        st.error("Augšupielādētajā CSV failā nav vajadzīgo kolonnu.")
+    try:
+        subject_frames = load_subject_frames(uploaded_file.file_id, uploaded_file)
+    except ValueError as e:
+        # Arī nederīgs fails aizstāj iepriekšējo – iepriekšējā faila fona darbi vairs nav vajadzīgi.
+        get_precomputer().cancel()
+        st.error(str(e))
     else:
-        # Izņem rindas, kur skolēna ID = 0.
-        df = df[df["Eksāmena kārtošanas personas identifikators"].astype(str) != "0"]
-
-        # Mācību priekšmeta izvēle
-        # Rādītās opcijas tagad ir "Matemātika" un "Latviešu valoda"
-        # Iekšēji filtrējam pēc "Matemātik" un "Latviešu valod"
-        subject_dict = {
-            "Matemātika": "Matemātik",
-            "Latviešu valoda": "Latviešu valod"
-        }
         subject_choice = st.sidebar.selectbox("Izvēlies mācību priekšmetu", list(subject_dict.keys()), index=0)
-        subject_filter = subject_dict[subject_choice]
-
-        # Filtrējam rindas pēc mācību priekšmeta (case-insensitive)
-        df = df[df["Pārbaudījuma mācību priekšmeta nosaukums"].str.contains(subject_filter, case=False, na=False)]
-
-        # Pārliecināmies, ka "Pārbaudījuma klases pakāpe" ir teksts
-        df["Pārbaudījuma klases pakāpe"] = df["Pārbaudījuma klases pakāpe"].astype(str)
-
-        # Saglabājam tikai tos skolēnus, kuriem ir vairākas eksāmenu ieraksti.
-        student_counts = df["Eksāmena kārtošanas personas identifikators"].value_counts()
-        repeated_ids = student_counts[student_counts > 1].index
-        df = df[df["Eksāmena kārtošanas personas identifikators"].isin(repeated_ids)]
+        df = subject_frames[subject_choice]
 
         st.write(
             f"Ierakstu skaits pēc filtrēšanas ({subject_choice} tikai, ID ≠ 0 un skolēni ar vairākām ierakstiem): {df.shape[0]}")
@@ -64,8 +169,7 @@ if uploaded_file is not None:
         exam_types = sorted(df["Pārbaudījuma tips"].unique())
         st.sidebar.write("Pieejamie eksāmenu tipi atlasītajos datos:", exam_types)
 
-        default_x = "Diagnosticējošais darbs" if "Diagnosticējošais darbs" in exam_types else exam_types[0]
-        default_y = "Centralizēts eksāmens" if "Centralizēts eksāmens" in exam_types else exam_types[0]
+        default_x, default_y = default_exam_pair(exam_types)
 
         exam_x = st.sidebar.selectbox("Izvēlies eksāmenu tipu X-asi", exam_types, index=exam_types.index(default_x))
         exam_y = st.sidebar.selectbox("Izvēlies eksāmenu tipu Y-asi", exam_types, index=exam_types.index(default_y))
@@ -73,54 +177,37 @@ if uploaded_file is not None:
 
         # Funkcija, lai izvēlētos klases pakāpi atkarībā no eksāmenu tipa.
         def get_grade_filter(exam_type, axis_label):
-            df_exam = df[df["Pārbaudījuma tips"] == exam_type]
-            available_grades = sorted(df_exam["Pārbaudījuma klases pakāpe"].unique())
-            if not available_grades:
+            grades = available_grades(df, exam_type)
+            if not grades:
                 return None
-            if exam_type == "Centralizēts eksāmens" and "12" in available_grades:
-                default_index = available_grades.index("12")
-            else:
-                default_index = 0
+            default_index = grades.index(default_grade(exam_type, grades))
             return st.sidebar.selectbox(f"Izvēlies klases pakāpi {exam_type} eksāmenam ({axis_label}-asi)",
-                                        available_grades, index=default_index)
+                                        grades, index=default_index)
 
 
         grade_filter_x = get_grade_filter(exam_x, "X")
         grade_filter_y = get_grade_filter(exam_y, "Y")
 
-        df_x = df[df["Pārbaudījuma tips"] == exam_x]
-        if grade_filter_x:
-            df_x = df_x[df_x["Pārbaudījuma klases pakāpe"] == grade_filter_x]
-
-        df_y = df[df["Pārbaudījuma tips"] == exam_y]
-        if grade_filter_y:
-            df_y = df_y[df_y["Pārbaudījuma klases pakāpe"] == grade_filter_y]
-
-        # Grupējam datus pēc skolēna ID un aprēķinām vidējo rezultātu, ja skolēnam ir vairāki ieraksti
-        df_x_grouped = df_x.groupby("Eksāmena kārtošanas personas identifikators")["Procenti"].mean().reset_index()
-        df_y_grouped = df_y.groupby("Eksāmena kārtošanas personas identifikators")["Procenti"].mean().reset_index()
-
-        # Apvienojam datus pēc skolēna ID – saglabājam tikai tos, kuriem ir abi eksāmenu tipi.
-        merged = pd.merge(df_x_grouped, df_y_grouped,
-                          on="Eksāmena kārtošanas personas identifikators",
-                          suffixes=("_x", "_y"))
-
-        # Izņemam gadījumus, kur rezultāts ir 0 kādā no eksāmenu tipiem.
-        merged = merged[(merged["Procenti_x"] != 0) & (merged["Procenti_y"] != 0)]
+        # Rezultātu ņemam no kopīgā keša; pārējās kombinācijas fonā aprēķina darba pavedieni.
+        # Jauns fails (cits file_id) atceļ iepriekšējā faila vēl nesāktos darbus.
+        file_key = uploaded_file.file_id
+        compute = partial(correlate, subject_frames)
+        precomputer = get_precomputer()
+        merged, corr = precomputer.get_or_compute(
+            file_key, compute, (subject_choice, exam_x, grade_filter_x, exam_y, grade_filter_y))
 
         st.write(f"Skolēnu skaits ar abiem eksāmenu tipiem un nenulles rezultātiem: {merged.shape[0]}")
 
-        if merged.shape[0] < 3:
+        if corr is None:
             st.warning("Nepietiekams datu punktu skaits (vajag vismaz 3), lai aprēķinātu nozīmīgu korelāciju.")
         else:
-            r, p_value = stats.pearsonr(merged["Procenti_x"], merged["Procenti_y"])
-            n = merged.shape[0]
-            se = np.sqrt((1 - r ** 2) / (n - 2))
+            import matplotlib.pyplot as plt
+            import matplotlib.gridspec as gridspec
 
             st.subheader("Korelācijas rezultāti")
-            st.write(f"**Pīrsona korelācijas koeficients:** {r:.3f}")
-            st.write(f"**Standartkļūda (korelācijas kļūda):** {se:.3f}")
-            st.write(f"**P-vērtība:** {p_value:.3f}")
+            st.write(f"**Pīrsona korelācijas koeficients:** {corr['r']:.3f}")
+            st.write(f"**Standartkļūda (korelācijas kļūda):** {corr['se']:.3f}")
+            st.write(f"**P-vērtība:** {corr['p_value']:.3f}")
 
             # Izveidojam grafiku ar galveno izkliedes diagrammu un malu histogrammām.
             fig = plt.figure(figsize=(8, 8))
@@ -138,9 +225,8 @@ if uploaded_file is not None:
             ax_main.set_ylim(0, 100)
 
             # Aprēķina un uzzīmē reģresijas līniju.
-            slope, intercept, r_val, p_val, std_err = stats.linregress(merged["Procenti_x"], merged["Procenti_y"])
             x_vals = np.array([0, 100])
-            y_vals = intercept + slope * x_vals
+            y_vals = corr["intercept"] + corr["slope"] * x_vals
             ax_main.plot(x_vals, y_vals, '--', color='red', label="Regresijas līnija")
             ax_main.legend()
 
@@ -153,5 +239,14 @@ if uploaded_file is not None:
             ax_yhist.axis('off')
 
             st.pyplot(fig)
+
+        # Fona darbus sākam (vai pārkārtojam) tikai tad, kad izvēlētais rezultāts jau ir uzzīmēts;
+        # nākamo izvēļu sarakstu veidojam tikai tad, ja izvēle ir mainījusies.
+        precomputer.start(file_key, (subject_choice, exam_x, exam_y), compute,
+                          partial(likely_next_combos, subject_frames, subject_choice, exam_x, exam_y))
+        with st.sidebar:
+            show_progress("Fonā sagatavo citas izvēles")
 else:
+    # Nav faila (vai tas izņemts) – šīs sesijas fona darbi vairs nav vajadzīgi.
+    get_precomputer().cancel()
     st.info("Lūdzu, augšupielādē CSV failu, lai sāktu.")
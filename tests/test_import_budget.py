@@ -0,0 +1,64 @@
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+ROOT = Path(__file__).resolve().parent.parent
+APPS = ["scratch_20.py", "scratch_21.py", "scratch_22.py"]
+
+# Moduļi, kurus drīkst importēt tikai tile, kam tie vajadzīgi (vai palaišanas skripts run_dashboard.py).
+# Pārbaudām tikai tos moduļus, ko pievieno pašas lietotnes importi: streamlit pats jau ielādē
+# daļu no plotly, bet ne plotly.express.
+DEFERRED_MODULES = ["plotly", "scipy", "matplotlib"]
+
+# Maksimālais laiks (sekundēs), ko lietotnes moduļa līmeņa importi pievieno virs streamlit un
+# pandas bāzes līnijas. Šobrīd tie ir tikai altair un vietējie moduļi; scipy un matplotlib
+# atgriešana moduļa līmenī pievieno ap 1,4 s un šo budžetu pārsniedz.
+IMPORT_BUDGET_SECONDS = 0.5
+
+# Vispirms ielādējam streamlit un pandas (bāzes līnija, ko lietotne neietekmē), tad
+# izpildām lietotnes importus un mērām tikai to, ko tie pievieno.
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import streamlit, pandas
+before = set(sys.modules)
+start = time.perf_counter()
+exec(compile({source!r}, {app!r}, "exec"))
+elapsed = time.perf_counter() - start
+added = set(sys.modules) - before
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": sorted({{m.split(".")[0] for m in added}} & set({deferred!r})),
+}}))
+"""
+
+
+def module_level_imports(app):
+    # Tikai moduļa līmeņa import rindas – importi funkcijās un zaros ir atlikti apzināti.
+    tree = ast.parse((ROOT / app).read_text(encoding="utf-8"))
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def probe(app):
+    code = _PROBE.format(root=str(ROOT), source=module_level_imports(app), app=app,
+                         deferred=DEFERRED_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                         text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("app", APPS)
+def test_heavy_modules_are_deferred(app):
+    assert probe(app)["loaded"] == []
+
+
+@pytest.mark.parametrize("app", APPS)
+def test_import_time_within_budget(app):
+    assert probe(app)["elapsed"] < IMPORT_BUDGET_SECONDS
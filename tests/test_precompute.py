@@ -0,0 +1,161 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from precompute import Precomputer, ResultCache  # noqa: E402
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def make_compute(calls, block_on=None, started=None, gate=None, fail_on=None):
+    # Records every call; the job for block_on signals `started` and waits for `gate`.
+    def compute(i):
+        if i == block_on:
+            started.set()
+            gate.wait(5)
+        if i == fail_on:
+            raise RuntimeError("boom")
+        calls.append(i)
+        return i * 10
+    return compute
+
+
+def combos(*items):
+    return lambda: [(i,) for i in items]
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def finished(precomputer):
+    done, total = precomputer.progress()
+    return done == total and precomputer._running is None
+
+
+def test_cache_evicts_least_recently_used_file():
+    cache = ResultCache(max_files=2, max_entries_per_file=10)
+    cache.put(("a", 1), "a1")
+    cache.put(("b", 1), "b1")
+    assert cache.get(("a", 1)) == "a1"  # "a" is now the most recently used file
+    cache.put(("c", 1), "c1")
+    assert ("b", 1) not in cache
+    assert ("a", 1) in cache and ("c", 1) in cache
+
+
+def test_cache_caps_entries_per_file():
+    cache = ResultCache(max_files=2, max_entries_per_file=3)
+    for i in range(5):
+        cache.put(("a", i), i)
+    cache.put(("b", 0), 0)
+    assert [i for i in range(5) if ("a", i) in cache] == [2, 3, 4]
+    assert ("b", 0) in cache
+
+
+def test_new_file_drops_old_queue(executor):
+    started, gate = threading.Event(), threading.Event()
+    old_calls, new_calls = [], []
+    precomputer = Precomputer(executor, ResultCache())
+    precomputer.start("f1", "s", make_compute(old_calls, 0, started, gate), combos(0, 1, 2, 3))
+    assert started.wait(5)
+
+    precomputer.start("f2", "s", make_compute(new_calls), combos(10, 11))
+    gate.set()
+    wait_until(lambda: finished(precomputer))
+
+    assert old_calls == [0]
+    assert new_calls == [10, 11]
+    assert precomputer.progress() == (2, 2)
+
+
+def test_new_selection_reorders_queue(executor):
+    started, gate = threading.Event(), threading.Event()
+    calls, built = [], []
+    precomputer = Precomputer(executor, ResultCache())
+    compute = make_compute(calls, 0, started, gate)
+    precomputer.start("f", "s1", compute, combos(0, 1, 2, 3, 4))
+    assert started.wait(5)
+
+    def make_combos():
+        built.append(True)
+        return [(4,), (0,), (3,)]
+
+    precomputer.start("f", "s2", compute, make_combos)
+    precomputer.start("f", "s2", compute, make_combos)  # same selection: list is not rebuilt
+    gate.set()
+    wait_until(lambda: finished(precomputer))
+
+    assert len(built) == 1
+    assert calls == [0, 4, 3]
+    assert precomputer.progress() == (3, 3)
+
+
+def test_cancel_drops_queue(executor):
+    started, gate = threading.Event(), threading.Event()
+    calls = []
+    precomputer = Precomputer(executor, ResultCache())
+    precomputer.start("f", "s", make_compute(calls, 0, started, gate), combos(0, 1, 2))
+    assert started.wait(5)
+
+    precomputer.cancel()
+    gate.set()
+    wait_until(lambda: precomputer._running is None)
+
+    assert calls == [0]
+    assert precomputer.progress() == (0, 0)
+
+
+def test_get_or_compute_waits_for_running_job(executor):
+    started, gate = threading.Event(), threading.Event()
+    calls, inline_calls = [], []
+    precomputer = Precomputer(executor, ResultCache())
+    precomputer.start("f", "s", make_compute(calls, 0, started, gate), combos(0))
+    assert started.wait(5)
+
+    threading.Timer(0.05, gate.set).start()
+    assert precomputer.get_or_compute("f", make_compute(inline_calls), (0,)) == 0
+    assert calls == [0]
+    assert inline_calls == []
+
+
+def test_get_or_compute_computes_queued_job_inline(executor):
+    started, gate = threading.Event(), threading.Event()
+    calls, inline_calls = [], []
+    precomputer = Precomputer(executor, ResultCache())
+    precomputer.start("f", "s", make_compute(calls, 0, started, gate), combos(0, 1))
+    assert started.wait(5)
+
+    assert precomputer.get_or_compute("f", make_compute(inline_calls), (1,)) == 10
+    gate.set()
+    wait_until(lambda: finished(precomputer))
+
+    assert inline_calls == [1]
+    assert calls == [0]  # the worker skips the combination the UI already cached
+
+
+def test_failed_job_is_logged_and_queue_moves_on(executor, caplog):
+    calls, inline_calls = [], []
+    precomputer = Precomputer(executor, ResultCache())
+    precomputer.start("f", "s", make_compute(calls, fail_on=0), combos(0, 1))
+    wait_until(lambda: finished(precomputer))
+
+    assert calls == [1]
+    assert "Background precomputation of (0,) failed" in caplog.text
+    assert precomputer.get_or_compute("f", make_compute(inline_calls), (0,)) == 0
+    assert inline_calls == [0]